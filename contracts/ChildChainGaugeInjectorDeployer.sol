@@ -0,0 +1,50 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.6;
+
+import "./ChildChainGaugeInjectoooor.sol";
+
+/**
+ * @title The ChildChainGaugeInjectorDeployer Contract
+ * @notice Deploys ChildChainGaugeInjectors with CREATE2 so a given configuration always lands on the same address.
+ * @notice The owner is part of the salt, so nobody else can claim the address a configuration maps to.
+ * @notice Ownership of a new injector is transferred to the owner in the same transaction and must then be accepted by them.
+ */
+contract ChildChainGaugeInjectorDeployer {
+    event InjectorDeployed(address injector, address owner);
+
+    /**
+     * @param keeperRegistryAddress The address of the keeper registry contract
+     * @param minWaitPeriodSeconds The minimum wait period for address between funding (for security)
+     * @param injectTokenAddress The ERC20 token the injector should mange
+     * @param owner The address that will be able to accept ownership of the injector
+     * @return injector The address of the deployed injector
+     */
+    function deployInjector(
+        address keeperRegistryAddress,
+        uint256 minWaitPeriodSeconds,
+        address injectTokenAddress,
+        address owner
+    ) external returns (address injector) {
+        bytes32 salt = getSalt(keeperRegistryAddress, minWaitPeriodSeconds, injectTokenAddress, owner);
+        ChildChainGaugeInjector deployed = new ChildChainGaugeInjector{salt: salt}(
+            keeperRegistryAddress,
+            minWaitPeriodSeconds,
+            injectTokenAddress
+        );
+        deployed.transferOwnership(owner);
+        emit InjectorDeployed(address(deployed), owner);
+        return address(deployed);
+    }
+
+    /**
+     * @notice Gets the CREATE2 salt used for an injector configuration
+     */
+    function getSalt(
+        address keeperRegistryAddress,
+        uint256 minWaitPeriodSeconds,
+        address injectTokenAddress,
+        address owner
+    ) public pure returns (bytes32) {
+        return keccak256(abi.encode(keeperRegistryAddress, minWaitPeriodSeconds, injectTokenAddress, owner));
+    }
+}
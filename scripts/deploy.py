@@ -2,14 +2,19 @@ from brownie import (
     interface,
     accounts,
     chain,
+    network,
+    web3,
     ChildChainGaugeInjector,
+    ChildChainGaugeInjectorDeployer,
 )
+import os
+import subprocess
 
 
-account = accounts.load("tmdelegate") #load your account here
 ADMIN_ADDRESS = "0xc38c5f97B34E175FFd35407fc91a937300E33860" # Balancer Maxi LM Multisig on mainnet, polygon and arbi
 UPKEEP_CALLER_ADDRESS = "0x75c0530885F385721fddA23C539AF3701d6183D4" ## Chainlink Registry on Arbitrum
 TOKEN_ADDRESS = "0x912ce59144191c1204e64559fe8253a0e49e6548" # LDO address on Arbiturm
+MIN_WAIT_PERIOD_SECONDS = 60 * 60 * 6  # minWaitPeriodSeconds is 6 hours
 
 
 REGISTRY_BY_CHAIN = {
@@ -19,17 +24,81 @@ REGISTRY_BY_CHAIN = {
 
 
 LINK_BY_CHAIN = {
-    42161: "0xf97f4df75117a78c1A5a0DBb814Af92458539FB4"
+    42161: "0xf97f4df75117a78c1A5a0DBb814Af92458539FB4",
     137: "0xb0897686c545045aFc77CF20eC7A532E3120E0F1"
 }
 
+## Arachnid's deterministic deployment proxy, CREATE2s calldata[32:] with salt calldata[:32]
+DETERMINISTIC_DEPLOYMENT_PROXY = "0x4e59b44847b379578588920cA78FbF26c0B4956C"
+FACTORY_SALT = bytes(32)
 
-injector = ChildChainGaugeInjector.deploy(
-    REGISTRY_BY_CHAIN[chain.id],
-    60 * 60 * 6,  # minWaitPeriodSeconds is 6 days
-    TOKEN_ADDRESS,
-    {"from": account},
-    publish_source=True
-)
+## chains where the source is published to the block explorer after deploying
+PUBLISH_CHAIN_IDS = (1, 137, 42161)
+
+
+def create2_address(deployer, salt, init_code):
+    """
+    Returns the address a CREATE2 from deployer with salt and init_code (hex string) lands on.
+    """
+    digest = web3.keccak(
+        b"\xff" + bytes.fromhex(deployer[2:]) + bytes(salt) + web3.keccak(hexstr=init_code)
+    )
+    return web3.toChecksumAddress(digest[12:].hex())
+
+
+def predict_injector_address(factory, keeper_registry, min_wait_period_seconds, token, owner):
+    """
+    Returns the address factory.deployInjector will CREATE2 the injector to for this configuration.
+    """
+    salt = factory.getSalt(keeper_registry, min_wait_period_seconds, token, owner)
+    init_code = ChildChainGaugeInjector.deploy.encode_input(keeper_registry, min_wait_period_seconds, token)
+    return create2_address(factory.address, salt, init_code)
+
+
+def get_or_deploy_factory(account):
+    """
+    Returns the ChildChainGaugeInjectorDeployer at its deterministic address, deploying it through
+    the deterministic deployment proxy first if it isn't there yet.
+    The factory address depends only on its compiled bytecode, so injector addresses are stable across runs.
+    """
+    assert len(web3.eth.get_code(DETERMINISTIC_DEPLOYMENT_PROXY)) > 0, \
+        f"deterministic deployment proxy not deployed on chain {chain.id}"
+    init_code = ChildChainGaugeInjectorDeployer.bytecode
+    factory_address = create2_address(DETERMINISTIC_DEPLOYMENT_PROXY, FACTORY_SALT, init_code)
+    if len(web3.eth.get_code(factory_address)) == 0:
+        account.transfer(DETERMINISTIC_DEPLOYMENT_PROXY, 0, data="0x" + FACTORY_SALT.hex() + init_code.replace("0x", ""))
+        print(f"Deployed ChildChainGaugeInjectorDeployer at {factory_address}")
+    return ChildChainGaugeInjectorDeployer.at(factory_address)
+
+
+def main():
+    account = accounts.load("tmdelegate") #load your account here
+    factory = get_or_deploy_factory(account)
+
+    config = (REGISTRY_BY_CHAIN[chain.id], MIN_WAIT_PERIOD_SECONDS, TOKEN_ADDRESS, ADMIN_ADDRESS)
+    injector_address = predict_injector_address(factory, *config)
+
+    if len(web3.eth.get_code(injector_address)) > 0:
+        print(f"Injector with this configuration already deployed at {injector_address}")
+    else:
+        factory.deployInjector(*config, {"from": account})
+    injector = ChildChainGaugeInjector.at(injector_address)
+
+    # the factory hands ownership over on deploy, the admin still has to accept it
+    owner = injector.owner()
+    assert owner in (factory.address, ADMIN_ADDRESS), f"unexpected injector owner {owner}"
+    if owner == factory.address:
+        print(f"Waiting for {ADMIN_ADDRESS} to call acceptOwnership()")
 
-injector.transferOwnership(ADMIN_ADDRESS, {"from": account})
+    if chain.id in PUBLISH_CHAIN_IDS:
+        # verify in the background so the deploy doesn't wait on the explorer poller
+        verify_cmd = [
+            "brownie", "run", "scripts/verify.py", "main", injector.address, *[str(arg) for arg in config[:3]],
+            "--network", network.show_active()
+        ]
+        log_path = os.path.join("build", f"verify_{chain.id}_{injector.address}.log")
+        os.makedirs("build", exist_ok=True)
+        with open(log_path, "w") as log:
+            verifier = subprocess.Popen(verify_cmd, stdout=log, stderr=subprocess.STDOUT)
+        print(f"Verifying source in the background (pid {verifier.pid}), output in {log_path}")
+        print(f"If verification fails, retry with: {' '.join(verify_cmd)}")
@@ -0,0 +1,102 @@
+from brownie import (
+    chain,
+    ChildChainGaugeInjector,
+)
+from brownie._config import CONFIG
+from brownie.network.contract import _explorer_tokens
+from eth_abi import encode_abi
+import json
+import os
+import requests
+import time
+
+
+VERIFIED_CACHE_PATH = os.path.join("build", "verified_sources.json") # chain:address -> bytecodeSha1 of the verified build
+LICENSE_CODES = {"MIT": 3}  # explorer license type codes, 1 is "No License"
+STATUS_POLLS = 20
+STATUS_POLL_SECONDS = 10
+
+
+def _load_verified():
+    if not os.path.exists(VERIFIED_CACHE_PATH):
+        return {}
+    with open(VERIFIED_CACHE_PATH) as f:
+        return json.load(f)
+
+
+def _explorer_api():
+    url = CONFIG.active_network.get("explorer")
+    if url is None:
+        raise ValueError("Explorer API not set for this network")
+    env_token = next((env for name, env in _explorer_tokens.items() if name in url), None)
+    if env_token is None or os.getenv(env_token) is None:
+        raise ValueError(f"No explorer API token set for {url}")
+    return url, os.getenv(env_token)
+
+
+def publish_injector_source(injector_address, keeper_registry, min_wait_period_seconds, token):
+    """
+    Submits the injector source with explicitly encoded constructor args and waits for the explorer's verdict.
+    Brownie's publish_source reads the args from the contract's creation transaction, which injectors
+    created by ChildChainGaugeInjectorDeployer don't have.
+    """
+    url, api_key = _explorer_api()
+    info = ChildChainGaugeInjector.get_verification_info()
+    flattener = ChildChainGaugeInjector._flattener
+    constructor_args = encode_abi(
+        ["address", "uint256", "address"], [keeper_registry, int(min_wait_period_seconds), token]
+    ).hex()
+    response = requests.post(url, data={
+        "apikey": api_key,
+        "module": "contract",
+        "action": "verifysourcecode",
+        "contractaddress": injector_address,
+        "sourceCode": json.dumps(flattener.standard_input_json),
+        "codeformat": "solidity-standard-json-input",
+        "contractname": f"{flattener.contract_file}:{flattener.contract_name}",
+        "compilerversion": f"v{info['compiler_version']}",
+        "optimizationUsed": 1 if info["optimizer_enabled"] else 0,
+        "runs": info["optimizer_runs"],
+        "constructorArguements": constructor_args,
+        "licenseType": LICENSE_CODES.get(info["license_identifier"], 1),
+    }).json()
+    if response["status"] != "1":
+        if "already verified" in response["result"].lower():
+            print(response["result"])
+            return True
+        print(f"Verification submission failed: {response['result']}")
+        return False
+
+    guid = response["result"]
+    for _ in range(STATUS_POLLS):
+        time.sleep(STATUS_POLL_SECONDS)
+        status = requests.get(url, params={
+            "apikey": api_key, "module": "contract", "action": "checkverifystatus", "guid": guid
+        }).json()["result"]
+        if status.startswith("Pending"):
+            continue
+        print(status)
+        return status.startswith("Pass") or "already verified" in status.lower()
+    print(f"Verification still pending after {STATUS_POLLS * STATUS_POLL_SECONDS}s, guid {guid}")
+    return False
+
+
+def main(injector_address, keeper_registry, min_wait_period_seconds, token):
+    """
+    Publishes the injector source to the chain's block explorer.
+    Skipped if this address was already verified with the same compiled bytecode.
+    """
+    key = f"{chain.id}:{injector_address.lower()}"
+    bytecode_hash = ChildChainGaugeInjector._build["bytecodeSha1"]
+    verified = _load_verified()
+    if verified.get(key) == bytecode_hash:
+        print(f"{injector_address} already verified, skipping")
+        return
+
+    if publish_injector_source(injector_address, keeper_registry, min_wait_period_seconds, token):
+        verified[key] = bytecode_hash
+        os.makedirs(os.path.dirname(VERIFIED_CACHE_PATH), exist_ok=True)
+        with open(VERIFIED_CACHE_PATH, "w") as f:
+            json.dump(verified, f, indent=2)
+    else:
+        raise SystemExit(f"Verification of {injector_address} failed")
@@ -1,8 +1,13 @@
 import pytest
 import time
+from functools import lru_cache
 from brownie import (
     interface,
     accounts,
+    chain,
+    history,
+    multicall,
+    web3,
     ChildChainGaugeInjector,
     Contract
 
@@ -22,6 +27,10 @@ ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 ARBI_LDO_ADDRESS = "0xC3C7d422809852031b44ab29EEC9F1EfF2A58756"
 WEEKLY_INCENTIVE = 200*10**18
 LM_MULTISIG ="0xc38c5f97B34E175FFd35407fc91a937300E33860"
+ADMIN = ARBI_LDO_WHALE
+WHALE = ARBI_WSTETH_USDC_WHALE
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+_CONTRACTS = {}
 ## weth, usdt, usdc
 TOKEN_LIST = [
     "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619",
@@ -30,47 +39,144 @@ TOKEN_LIST = [
 ]
 
 
-@pytest.fixture(scope="module")
-def get_rewards():
-    return "0x1afe22a6"  # get_rewards has function selector "0x1afe22a6"
+@lru_cache(maxsize=None)
+def _multicall3_deployed():
+    return len(web3.eth.get_code(MULTICALL3_ADDRESS)) > 0
 
-@pytest.fixture(scope="module")
-def admin():
-    return ARBI_LDO_WHALE
 
+def batch_reads(*calls):
+    """
+    Resolves a group of view calls in a single Multicall3 aggregate call.
+    Each call is a tuple of (contract_method, *args).  Falls back to one eth_call per read
+    if Multicall3 is not deployed on the test chain.
+    Raises ValueError if a batched call reverts, since multicall returns None for it instead of raising.
+    """
+    if not _multicall3_deployed():
+        return [method(*args) for method, *args in calls]
+    with multicall(address=MULTICALL3_ADDRESS):
+        results = [method(*args) for method, *args in calls]
+    # unwrap the lazy multicall proxies so callers get plain values back
+    results = [getattr(result, "__wrapped__", result) for result in results]
+    for (method, *args), result in zip(calls, results):
+        if result is None:
+            raise ValueError(f"{method._name}{tuple(args)} reverted in multicall")
+    return results
+
+
+def advance(seconds):
+    """
+    Moves chain time forward and mines a block at the new timestamp in a single evm_mine.
+    """
+    chain.mine(timedelta=seconds)
 
 
-@pytest.fixture(scope="module")
-def whale():
-    return ARBI_WSTETH_USDC_WHALE
+def multicall_balances(tokens, holders):
+    """
+    Reads balanceOf for every holder of every token in one batch.
+    Returns one row of balances per token, in holder order.
+    """
+    balances = batch_reads(*[(token.balanceOf, holder) for token in tokens for holder in holders])
+    return [balances[i:i + len(holders)] for i in range(0, len(balances), len(holders))]
+
+
+def load_contract(address):
+    """
+    Returns a Contract for address, loading it at most once per session.
+    """
+    if address not in _CONTRACTS:
+        _CONTRACTS[address] = Contract(address)
+    return _CONTRACTS[address]
+
+
+class StateCache:
+    """
+    Caches view call results until the next transaction is sent.
+    Results are keyed by (contract, method, args) and dropped as soon as brownie's tx history grows.
+    Only route reads through here that don't depend on block.timestamp.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._history_length = len(history)
+
+    def read(self, method, *args):
+        if len(history) != self._history_length:
+            self._results.clear()
+            self._history_length = len(history)
+        key = (method._address, method._name, tuple(str(arg) for arg in args))
+        if key not in self._results:
+            self._results[key] = method(*args)
+        return self._results[key]
+
+
+@pytest.fixture(autouse=True)
+def isolate(fn_isolation):
+    # snapshot the chain before each test and revert after, so tests share their module's deploy
+    pass
+
+
+@pytest.fixture()
+def state_cache():
+    return StateCache()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--check-redundant-calls",
+        action="store_true",
+        help="fail tests that repeat an injector view call with the same args while nothing changed",
+    )
+
+
+@pytest.fixture(autouse=True)
+def assert_no_redundant_view_calls(request, monkeypatch):
+    """
+    With --check-redundant-calls, fails a test that repeats an injector view call with the same args
+    while no tx was sent and no block was mined.
+    Costs an extra eth_blockNumber per view call, so it is off by default.
+    """
+    if not request.config.getoption("--check-redundant-calls") or "injector" not in request.fixturenames:
+        return
+    injector = request.getfixturevalue("injector")
+    last_seen = {}
+
+    def watch(name, method):
+        def watched(*args):
+            key = (name, tuple(str(arg) for arg in args if not isinstance(arg, dict)))
+            state = (len(history), web3.eth.block_number)
+            assert last_seen.get(key) != state, f"redundant {name}{key[1]}: nothing changed since the same call was last made"
+            last_seen[key] = state
+            return method(*args)
+        watched.call = method.call
+        return watched
+
+    for abi in injector.abi:
+        if abi["type"] == "function" and abi["stateMutability"] in ("view", "pure"):
+            monkeypatch.setattr(injector, abi["name"], watch(abi["name"], getattr(injector, abi["name"])))
 
 
 @pytest.fixture(scope="module")
 def gauge():
-    return Contract(STREAMER_ADDRESS)
+    return load_contract(STREAMER_ADDRESS)
 
 @pytest.fixture(scope="module")
 def gauge2():
-    return Contract(STREAMER_ADDRESS2)
-
-@pytest.fixture(scope="module")
-def authorizer_adaptor():
-    return STREAMER_OWNER_ADDRESS
+    return load_contract(STREAMER_ADDRESS2)
 
 @pytest.fixture(scope="module")
 def authorizer_entrypoint():
-    return Contract(STREAMER_OWNER_ADDRESS)
+    return load_contract(STREAMER_OWNER_ADDRESS)
 
 @pytest.fixture(scope="module")
-def streamer():
-    return Contract(STREAMER_ADDRESS)
+def streamer(gauge):
+    return gauge  # same contract as gauge
 
 
 @pytest.fixture(scope="module")
 def upkeep_caller():
     return accounts[2]
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def weekly_incentive():
     return WEEKLY_INCENTIVE
 @pytest.fixture(scope="module")
@@ -78,7 +184,7 @@ def deployer():
     return accounts[0]
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def injector(deploy):
     return deploy.injector
 
@@ -92,12 +198,20 @@ def token_list():
     return TOKEN_LIST
 
 @pytest.fixture(scope="module")
-def deploy(deployer, admin, upkeep_caller, authorizer_adaptor, streamer, gauge, gauge2, get_rewards, token, authorizer_entrypoint,token_list):
+def token_contracts(token_list):
+    """
+    Contract for every token in token_list keyed by address, loaded once per module.
+    """
+    return {address: load_contract(address) for address in token_list}
+
+@pytest.fixture(scope="module")
+def deploy(module_isolation, deployer, upkeep_caller, streamer, gauge, gauge2, token, authorizer_entrypoint, token_list, weekly_incentive):
     """
     Deploys, vault and test strategy, mock token and wires them up.
+    The injector is funded for 3 rounds and schedules 2 rounds on gauge before any test snapshot is taken.
     """
 
-    # token.transfer(admin, 10000*10**18, {"from": ARBI_LDO_WHALE})
+    # token.transfer(ADMIN, 10000*10**18, {"from": ARBI_LDO_WHALE})
 
     injector = ChildChainGaugeInjector.deploy(
         upkeep_caller,
@@ -105,9 +219,8 @@ def deploy(deployer, admin, upkeep_caller, authorizer_adaptor, streamer, gauge,
         token.address,
         {"from": deployer}
     )
-    print(token.balanceOf(deployer))
-    injector.transferOwnership(admin, {"from": deployer})
-    injector.acceptOwnership({"from": admin})
+    injector.transferOwnership(ADMIN, {"from": deployer})
+    injector.acceptOwnership({"from": ADMIN})
 
 
     calldata = gauge.add_reward.encode_input(ARBI_LDO_ADDRESS,injector.address)
@@ -120,7 +233,8 @@ def deploy(deployer, admin, upkeep_caller, authorizer_adaptor, streamer, gauge,
     # calldata2 = gauge2.add_reward.encode_input(ARBI_LDO_ADDRESS,injector.address)
     # authorizer_entrypoint.performAction(gauge2.address, calldata, {'from': LM_MULTISIG})
 
-    token.transfer(admin,1000*10**18,{'from':ARBI_LDO_WHALE})
+    token.transfer(injector, weekly_incentive*3, {"from": ADMIN}) # Tokens for 3 rounds so we are stopped by max rounds in the injector config
+    injector.setRecipientList([gauge.address], [weekly_incentive], [2], {"from": ADMIN})
 
     return DotMap(
         injector=injector,
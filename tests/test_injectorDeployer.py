@@ -0,0 +1,52 @@
+import brownie
+from brownie import ChildChainGaugeInjector, ChildChainGaugeInjectorDeployer
+import pytest
+from conftest import ADMIN
+from scripts.deploy import get_or_deploy_factory, predict_injector_address
+
+
+MIN_WAIT_PERIOD_SECONDS = 60*5
+
+
+@pytest.fixture(scope="module")
+def factory(module_isolation, deployer):
+    return ChildChainGaugeInjectorDeployer.deploy({"from": deployer})
+
+
+@pytest.fixture(scope="module")
+def config(upkeep_caller, token):
+    return (upkeep_caller.address, MIN_WAIT_PERIOD_SECONDS, token.address, ADMIN)
+
+
+def test_deploy_injector(factory, config, deployer):
+    predicted = predict_injector_address(factory, *config)
+    assert factory.deployInjector.call(*config, {"from": deployer}) == predicted
+
+    tx = factory.deployInjector(*config, {"from": deployer})
+    assert tx.events["InjectorDeployed"]["injector"] == predicted
+    injector = ChildChainGaugeInjector.at(predicted)
+    assert injector.getKeeperRegistryAddress() == config[0]
+    assert injector.getMinWaitPeriodSeconds() == MIN_WAIT_PERIOD_SECONDS
+    assert injector.getInjectTokenAddress() == config[2]
+
+    # the factory owns the injector until the admin accepts the proposed transfer
+    assert injector.owner() == factory.address
+    assert tx.events["OwnershipTransferRequested"]["to"] == ADMIN
+    with brownie.reverts("Must be proposed owner"):
+        injector.acceptOwnership({"from": deployer})
+    injector.acceptOwnership({"from": ADMIN})
+    assert injector.owner() == ADMIN
+
+
+def test_redeploy_same_config_reverts(factory, config, deployer):
+    factory.deployInjector(*config, {"from": deployer})
+    with brownie.reverts():
+        factory.deployInjector(*config, {"from": deployer})
+
+
+def test_factory_deploy_is_deterministic(deployer):
+    factory = get_or_deploy_factory(deployer)
+    assert len(brownie.web3.eth.get_code(factory.address)) > 0
+    tx_count = len(brownie.history)
+    assert get_or_deploy_factory(deployer).address == factory.address
+    assert len(brownie.history) == tx_count  # found at the same address, not deployed again